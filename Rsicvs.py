@@ -1,18 +1,138 @@
 # app.py - Streamlit app: Yahoo Finance → Close + RSI(14) with warmup
 # העתק/הדבק והריץ: streamlit run app.py
 import io
+import logging
 from datetime import date, timedelta
+from functools import partial
+from importlib.util import find_spec
 import numpy as np
 import pandas as pd
 import yfinance as yf
 import streamlit as st
 
+try:
+    import xlsxwriter
+    _HAS_XLSXWRITER = True
+except ImportError:  # make_excel_bytes falls back to pandas + openpyxl
+    _HAS_XLSXWRITER = False
+# checked without importing openpyxl: it is only loaded if a workbook is actually built
+_HAS_EXCEL = _HAS_XLSXWRITER or find_spec("openpyxl") is not None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    # never quote, like pandas does for these fields; a pyarrow without quoting_header raises TypeError
+    _CSV_OPTIONS = pa_csv.WriteOptions(quoting_style="none", quoting_header="none")
+    _HAS_PYARROW = True
+except (ImportError, TypeError):  # pyarrow is optional; make_csv_bytes falls back to pandas' to_csv
+    _HAS_PYARROW = False
+
+try:
+    import talib
+    _HAS_TALIB = True
+except ImportError:  # TA-Lib is optional; rsi_wilder falls back to numba, then pandas EWM
+    _HAS_TALIB = False
+
+try:
+    from numba import njit
+    _HAS_NUMBA = True
+except ImportError:  # numba is optional too; last resort is the pandas EWM
+    _HAS_NUMBA = False
+
+# Copy-on-Write (always on from pandas 3.0): column selections and slices stay lazy views until written
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+logger = logging.getLogger(__name__)
+
 st.set_page_config(page_title="YahooHist → Close + RSI(14) with Warmup", layout="wide")
 
 # ---------- Helpers ----------
 def _interval_from_choice(choice: str) -> str:
     return "60m" if choice == "שעה (Hourly)" else "1d"
 
+def _downsample(s: pd.Series, target: int = 300) -> pd.Series:
+    """Every k-th point so a chart gets ~`target` points whatever the window length."""
+    step = max(1, len(s) // target)
+    return s.iloc[::step]
+
+def _rsi_ewm(gain: np.ndarray, loss: np.ndarray, period: int) -> np.ndarray:
+    """Wilder RSI from gain/loss arrays via pandas EWM (NaN for the first `period` bars)."""
+    # Wilder's smoothing is an EMA with alpha = 1/period. Seed it with the SMA of the
+    # first `period` moves and start the EWM there, which reproduces the classic recursion.
+    g = gain[period:].copy()
+    l = loss[period:].copy()
+    g[0] = gain[1: period + 1].mean()
+    l[0] = loss[1: period + 1].mean()
+    ag = np.full_like(gain, np.nan)
+    al = np.full_like(loss, np.nan)
+    ag[period:] = pd.Series(g).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    al[period:] = pd.Series(l).ewm(alpha=1.0 / period, adjust=False).mean().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(al == 0.0, 100.0, 100.0 - 100.0 / (1.0 + ag / al))
+
+def _gain_loss(arr: np.ndarray) -> tuple:
+    """Gain/loss straight on the ndarray; the undefined first move counts as 0."""
+    delta = np.empty_like(arr)
+    delta[0] = np.nan
+    np.subtract(arr[1:], arr[:-1], out=delta[1:])
+    moved = ~np.isnan(delta)
+    gain = np.maximum(delta, 0.0, where=moved, out=np.zeros_like(delta))
+    loss = np.maximum(-delta, 0.0, where=moved, out=np.zeros_like(delta))
+    return gain, loss
+
+def _agrees_with_ewm(rsi_fn, period: int = 14) -> bool:
+    """True if `rsi_fn(prices, period)` matches the pandas EWM on flat and barely-moving series."""
+    n = 4 * period
+    for arr in (np.full(n, 100.0), np.full(n, 1e-4), 1e-4 + 1e-9 * np.sin(np.arange(n))):
+        if not np.allclose(rsi_fn(arr, period), _rsi_ewm(*_gain_loss(arr), period), equal_nan=True):
+            return False
+    return True
+
+if _HAS_NUMBA:
+    def _wilder_rsi_loop(gain: np.ndarray, loss: np.ndarray, period: int) -> np.ndarray:
+        """Wilder recursion over precomputed gain/loss arrays (index 0 is the undefined first move)."""
+        n = gain.size
+        out = np.full(n, np.nan)
+        ag = gain[1:period + 1].mean()
+        al = loss[1:period + 1].mean()
+        out[period] = 100.0 if al == 0.0 else 100.0 - 100.0 / (1.0 + ag / al)
+        for i in range(period + 1, n):
+            ag = (ag * (period - 1) + gain[i]) / period
+            al = (al * (period - 1) + loss[i]) / period
+            out[i] = 100.0 if al == 0.0 else 100.0 - 100.0 / (1.0 + ag / al)
+        return out
+
+    # Streamlit re-executes this file on every rerun; st.cache_resource keeps one compiled
+    # dispatcher per process instead of rebuilding it (and reloading numba's disk cache) each time
+    @st.cache_resource(show_spinner=False)
+    def _wilder_kernel():
+        kernel = njit(cache=True, fastmath=True)(_wilder_rsi_loop)
+        # compile (or load from the on-disk cache) up front, not on the first user request;
+        # a flat series must read RSI 100 at any price level, as on the EWM, or the kernel isn't used
+        if not _agrees_with_ewm(lambda arr, period: kernel(*_gain_loss(arr), period)):
+            raise RuntimeError("numba Wilder kernel disagrees with the pandas EWM")
+        return kernel
+
+    # a kernel that can't be built (or checked) here just leaves the pandas EWM in charge
+    try:
+        _wilder_rsi_nb = _wilder_kernel()
+    except Exception:
+        logger.exception("numba RSI kernel unavailable, using the pandas EWM")
+        _HAS_NUMBA = False
+
+def _rsi_array(arr: np.ndarray, period: int) -> np.ndarray:
+    """RSI of a NaN-free float64 array on the fastest backend available."""
+    if _HAS_TALIB:
+        # TA-Lib's RSI is the same SMA-seeded Wilder recursion, in C, except that it writes 0
+        # wherever avg gain + avg loss < 1e-8 (a flat run, or just very low prices) instead of 100
+        rsi_arr = talib.RSI(arr, timeperiod=period)
+        if not (rsi_arr == 0.0).any():
+            return rsi_arr
+    gain, loss = _gain_loss(arr)
+    return _wilder_rsi_nb(gain, loss, period) if _HAS_NUMBA else _rsi_ewm(gain, loss, period)
+
 def rsi_wilder(prices, period: int = 14) -> pd.Series:
     """
     RSI calculation using Wilder's smoothing with SMA start.
@@ -24,86 +144,153 @@ def rsi_wilder(prices, period: int = 14) -> pd.Series:
             return pd.Series(dtype="float64")
         prices = prices.iloc[:, 0]
 
-    prices = pd.Series(prices).copy()
+    if not isinstance(prices, pd.Series):
+        prices = pd.Series(prices)
     orig_index = prices.index
 
-    prices_numeric = prices.astype(float)
-    prices_no_na = prices_numeric.dropna()
+    # nothing here writes to `prices`, so no copy; cast and dropna only when they change something
+    if prices.dtype != np.float64:
+        prices = prices.astype(np.float64)
+    prices_no_na = prices.dropna() if prices.isna().any() else prices
     n = len(prices_no_na)
 
-    result = pd.Series(index=orig_index, data=np.nan, dtype="float64")
     if n <= period:
-        return result
-
-    delta = prices_no_na.diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-
-    gain_vals = gain.to_numpy()
-    loss_vals = loss.to_numpy()
-
-    rsi_vals = np.full(len(gain_vals), np.nan, dtype="float64")
-
-    first_gain_avg = np.mean(gain_vals[1: period + 1])
-    first_loss_avg = np.mean(loss_vals[1: period + 1])
-
-    avg_gain = float(first_gain_avg)
-    avg_loss = float(first_loss_avg)
-
-    if avg_loss == 0.0:
-        rsi_vals[period] = 100.0
-    else:
-        rs = avg_gain / avg_loss
-        rsi_vals[period] = 100.0 - (100.0 / (1.0 + rs))
-
-    for i in range(period + 1, len(gain_vals)):
-        g = gain_vals[i] if not np.isnan(gain_vals[i]) else 0.0
-        l = loss_vals[i] if not np.isnan(loss_vals[i]) else 0.0
-        avg_gain = (avg_gain * (period - 1) + g) / period
-        avg_loss = (avg_loss * (period - 1) + l) / period
-
-        if avg_loss == 0.0:
-            rsi_vals[i] = 100.0
-        else:
-            rs = avg_gain / avg_loss
-            rsi_vals[i] = 100.0 - (100.0 / (1.0 + rs))
-
-    rsi_series_no_na = pd.Series(rsi_vals, index=prices_no_na.index)
-
-    for idx, val in rsi_series_no_na.items():
-        result.at[idx] = val
-
-    return result
-
-@st.cache_data(show_spinner=False)
-def download_data(ticker: str, start: date, end: date, interval: str) -> pd.DataFrame:
+        return pd.Series(index=orig_index, data=np.nan, dtype="float64")
+
+    arr = prices_no_na.to_numpy(dtype=np.float64, copy=False)
+    rsi_arr = _rsi_array(arr, period)
+    rsi_series_no_na = pd.Series(rsi_arr, index=prices_no_na.index)
+    if n == len(orig_index):  # nothing was dropped — already aligned
+        return rsi_series_no_na
+    return rsi_series_no_na.reindex(orig_index)
+
+# Keyed on the series content: a new view key over the same prices (e.g. toggling the
+# OHLCV columns) reuses the RSI. Content hashing rather than a first/last/len digest,
+# since a revised bar in the middle of the history must not return a stale RSI.
+@st.cache_data(show_spinner=False, max_entries=32)
+def compute_rsi_cached(prices: pd.Series, period: int) -> pd.Series:
+    return rsi_wilder(prices, period)
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _ticker(symbol: str) -> yf.Ticker:
+    # One Ticker per symbol for the process lifetime: its metadata and yfinance's pooled
+    # HTTP session are reused across cache misses instead of being rebuilt every time.
+    return yf.Ticker(symbol)
+
+class _EmptyDownload(Exception):
+    """Raised by the cached downloaders instead of returning an empty frame."""
+
+def _download(ticker: str, start_iso: str, end_iso: str, interval: str) -> pd.DataFrame:
     """
-    Download historical data using yfinance.download.
-    For daily intervals, add one day to 'end' param to include the end date.
+    Download historical data using Ticker.history (single symbol, flat columns).
     Keep auto_adjust=False so we have both Close and Adj Close.
+    The index comes back tz-aware; it is returned as naive exchange wall time.
+    history() returns an empty frame on a network error or rate limit rather than raising;
+    that raises _EmptyDownload here, since st.cache_data doesn't store exceptions and the
+    range is fetched again next time instead of being cached (or persisted) as "no data".
     """
-    end_param = (end + timedelta(days=1)).isoformat() if interval == "1d" else end.isoformat()
-    df = yf.download(
-        ticker,
-        start=start.isoformat(),
-        end=end_param,
+    df = _ticker(ticker).history(
+        start=start_iso,
+        end=end_iso,
         interval=interval,
-        progress=False,
-        threads=True,
         auto_adjust=False,
         actions=False
     )
+    if df.empty:
+        raise _EmptyDownload(ticker)
+    if getattr(df.index, "tz", None) is not None:
+        df = df.tz_localize(None)
     return df
 
-def make_csv_bytes(df: pd.DataFrame) -> bytes:
-    return df.to_csv(index=True).encode("utf-8")
+# A range that ended before today won't change, so it is kept on disk and survives restarts.
+# Streamlit ignores ttl for persisted caches, so ranges that reach today get their own
+# in-memory cache that expires after an hour and picks up the newest bars.
+# Both are keyed on plain ISO strings, which hash cheaply and identically across reruns.
+@st.cache_data(show_spinner=False, persist="disk", max_entries=128)
+def _download_closed(ticker: str, start_iso: str, end_iso: str, interval: str) -> pd.DataFrame:
+    return _download(ticker, start_iso, end_iso, interval)
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=128)
+def _download_recent(ticker: str, start_iso: str, end_iso: str, interval: str) -> pd.DataFrame:
+    return _download(ticker, start_iso, end_iso, interval)
 
-def make_excel_bytes(df: pd.DataFrame) -> bytes:
+def download_data(ticker: str, start: date, end: date, interval: str) -> pd.DataFrame:
+    """For daily intervals, add one day to 'end' param to include the end date."""
+    end_param = end + timedelta(days=1) if interval == "1d" else end
+    fetch = _download_closed if end < date.today() else _download_recent
+    try:
+        return fetch(ticker, start.isoformat(), end_param.isoformat(), interval)
+    except _EmptyDownload:
+        return pd.DataFrame()
+
+# Export blobs are cached per DataFrame content, so reruns from the slider / expander
+# don't re-encode an unchanged frame (the Excel writer is the slow part here).
+@st.cache_data(show_spinner=False, max_entries=8)
+def make_csv_bytes(df: pd.DataFrame, decimals: dict, interval: str) -> bytes:
+    """
+    Serialize through Arrow's C++ CSV writer instead of pandas' to_csv.
+    Timestamps are cast to whole seconds so Arrow doesn't print a fractional part;
+    daily bars ("1d") are written as plain dates (2024-01-01), intraday ones with the time.
+    `decimals` ({column: digits}) is applied while writing, the frame itself is not rounded.
+    Without pyarrow, pandas' to_csv writes it, with floats in pandas' own format (5.0, not 5).
+    """
+    daily = interval == "1d"
+    if not _HAS_PYARROW:
+        date_format = "%Y-%m-%d" if daily else "%Y-%m-%d %H:%M:%S"
+        return df.round(decimals).to_csv(date_format=date_format).encode("utf-8")
+    if isinstance(df.index, pd.DatetimeIndex):
+        df = df.set_axis(df.index.as_unit("s"))
+    table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+    if daily and pa.types.is_timestamp(table.schema.field(0).type):
+        table = table.set_column(0, table.schema.field(0).name, table.column(0).cast(pa.date32()))
+    for name, digits in decimals.items():
+        i = table.schema.get_field_index(name)
+        table = table.set_column(i, name, pc.round(table.column(i), digits))
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(table, sink, _CSV_OPTIONS)
+    return sink.getvalue().to_pybytes()
+
+_EXCEL_CHUNK_ROWS = 10_000  # rows converted per chunk when streaming the sheet
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def make_excel_bytes(df: pd.DataFrame, decimals: dict) -> bytes:
+    """
+    Stream the sheet row by row through xlsxwriter's constant_memory mode.
+    pandas' to_excel emits cells column by column, which constant_memory silently drops,
+    so the rows are written directly. Excel has no time zones: datetimes are written as wall time.
+    `decimals` becomes a per-column number format; values keep full precision.
+    Without xlsxwriter, pandas writes the sheet through openpyxl with the values rounded instead.
+    """
     towrite = io.BytesIO()
-    with pd.ExcelWriter(towrite, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name="Close_RSI", index=True)
-    towrite.seek(0)
-    return towrite.read()
+    if not _HAS_XLSXWRITER:
+        index = df.index.tz_localize(None) if getattr(df.index, "tz", None) is not None else df.index
+        df.round(decimals).set_axis(index).to_excel(towrite, sheet_name="Close_RSI", engine="openpyxl")
+        return towrite.getvalue()
+    workbook = xlsxwriter.Workbook(towrite, {"constant_memory": True, "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+    sheet = workbook.add_worksheet("Close_RSI")
+    for c, name in enumerate(df.columns, start=1):
+        if name in decimals:
+            sheet.set_column(c, c, None, workbook.add_format({"num_format": "0." + "0" * decimals[name]}))
+    sheet.write_row(0, 0, [df.index.name or ""] + [str(c) for c in df.columns])
+    index = df.index.tz_localize(None) if getattr(df.index, "tz", None) is not None else df.index
+    timestamps = index.to_pydatetime()
+    # NaN -> None (an empty cell) one vectorized chunk at a time, not per value in Python
+    for start in range(0, len(df), _EXCEL_CHUNK_ROWS):
+        chunk = df.iloc[start:start + _EXCEL_CHUNK_ROWS]
+        rows = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+        for r, (ts, row) in enumerate(zip(timestamps[start:start + _EXCEL_CHUNK_ROWS], rows), start=start + 1):
+            sheet.write_datetime(r, 0, ts)
+            sheet.write_row(r, 1, row)
+    workbook.close()
+    return towrite.getvalue()
+
+def _excel_bytes_logged(df: pd.DataFrame, decimals: dict) -> bytes:
+    """The Excel button's deferred callable: it runs outside the script, so a failure is logged here."""
+    try:
+        return make_excel_bytes(df, decimals)
+    except Exception:
+        logger.exception("Excel export failed")
+        raise
 
 # ---------- Page layout ----------
 st.title("Yahoo Finance — Close + RSI(14) with Warmup")
@@ -201,6 +388,7 @@ with right_col:
         end_date = st.session_state["end_date"]
         interval_choice = st.session_state["interval_choice"]
         rsi_period = st.session_state["rsi_period"]
+        rsi_col = f"RSI_{rsi_period}"
         use_adj = st.session_state["use_adj"]
         include_ohlcv = st.session_state.get("include_ohlcv", False)
         warmup_enabled = st.session_state["warmup_enabled"]
@@ -226,138 +414,158 @@ with right_col:
             else:
                 download_start = start_date
 
-            # Download extended data
-            try:
-                with st.spinner("מוריד נתונים מ-Yahoo Finance (כולל חימום אם נבחר)..."):
-                    raw = download_data(ticker, download_start, end_date, interval)
-            except Exception as e:
-                st.error(f"שגיאה בעת הורדת הנתונים: {e}")
-                raw = pd.DataFrame()
-
-            if raw.empty:
-                st.warning(
-                    "לא נמצאו נתונים בטווח/לטיקר המבוקש. הצעות:\n"
-                    "- ודא שהטיקר תקין (נסה ללא תוספת שוק).\n"
-                    "- נסה טווח זמן קצר יותר (בעיקר עבור אינטרדיי).\n"
-                    "- נסה טיקר ידוע (AAPL, MSFT) לצורך בדיקה."
-                )
+            # Everything that shapes the view; slider / expander reruns keep the same key.
+            # The key has no clock in it, so a window reaching today is re-fetched on an explicit
+            # submit — _download_recent's 1h ttl then decides whether Yahoo is actually hit.
+            view_key = (ticker, download_start, start_date, end_date, interval, rsi_period, use_adj, include_ohlcv)
+            refresh = submit and end_date >= date.today()
+            if not refresh and st.session_state.get("last_view_key") == view_key:
+                df_view = st.session_state["last_df"]
+                source_used = st.session_state["last_source"]
             else:
-                df = raw.copy()
-                if not isinstance(df.index, pd.DatetimeIndex):
-                    df.index = pd.to_datetime(df.index)
-                df = df.sort_index()
-
-                has_adj = "Adj Close" in df.columns
-
-                cols = []
-                if include_ohlcv:
-                    for c in ("Open", "High", "Low", "Volume"):
-                        if c in df.columns:
-                            cols.append(c)
-                if "Close" in df.columns:
-                    cols.append("Close")
-                if has_adj:
-                    cols.append("Adj Close")
-
-                df_res_full = df[cols].copy()
-                df_res_full.index.name = "Datetime"
-
-                # choose price series (from extended data)
-                if use_adj and has_adj:
-                    price_series_for_rsi = df_res_full["Adj Close"]
-                    source_used = "Adj Close"
-                elif "Close" in df_res_full.columns:
-                    price_series_for_rsi = df_res_full["Close"]
-                    source_used = "Close"
+                df_view = None
+                # Download extended data
+                try:
+                    with st.spinner("מוריד נתונים מ-Yahoo Finance (כולל חימום אם נבחר)..."):
+                        raw = download_data(ticker, download_start, end_date, interval)
+                except Exception as e:
+                    st.error(f"שגיאה בעת הורדת הנתונים: {e}")
+                    raw = pd.DataFrame()
+
+                if raw.empty:
+                    st.warning(
+                        "לא נמצאו נתונים בטווח/לטיקר המבוקש. הצעות:\n"
+                        "- ודא שהטיקר תקין (נסה ללא תוספת שוק).\n"
+                        "- נסה טווח זמן קצר יותר (בעיקר עבור אינטרדיי).\n"
+                        "- נסה טיקר ידוע (AAPL, MSFT) לצורך בדיקה."
+                    )
                 else:
-                    st.error("אין עמודת מחיר זמינה לחישוב RSI.")
-                    price_series_for_rsi = None
-                    source_used = "None"
-
-                if price_series_for_rsi is not None:
-                    # compute RSI on the extended series
-                    rsi_series_full = rsi_wilder(price_series_for_rsi, period=rsi_period)
-                    df_res_full[f"RSI_{rsi_period}"] = rsi_series_full
-
-                    # Now trim to user-visible window: from start_date -> end_date
-                    view_mask = (df_res_full.index >= pd.to_datetime(start_date)) & (df_res_full.index <= pd.to_datetime(end_date) + pd.Timedelta(days=1))
-                    df_view = df_res_full.loc[view_mask].copy()
-                    # Note: for intraday the +1 day may include extra; but it's safe to then slice by <= end_date with time if needed
-                    df_view = df_view.loc[df_view.index <= pd.to_datetime(end_date) + pd.Timedelta(days=1)]
-
-                    # Round numeric columns safely
-                    numeric_cols = df_view.select_dtypes(include="number").columns
-                    for col in numeric_cols:
-                        if str(col).startswith("RSI"):
-                            df_view[col] = df_view[col].round(2)
-                        else:
-                            df_view[col] = df_view[col].round(4)
-
-                    # Save last df for download
-                    st.session_state["last_df"] = df_view
-
-                    # Display info: find first/last non-null RSI in the view (should exist if warmup adequate)
-                    non_null_idx = df_view.index[df_view[f"RSI_{rsi_period}"].notna()] if f"RSI_{rsi_period}" in df_view.columns else []
-                    if len(non_null_idx) > 0:
-                        first_idx = non_null_idx[0]
-                        last_idx = non_null_idx[-1]
-                        range_str = f"{first_idx.strftime('%Y-%m-%d %H:%M')} → {last_idx.strftime('%Y-%m-%d %H:%M')}"
+                    # st.cache_data already hands back a private copy, and yfinance returns a sorted DatetimeIndex
+                    df = raw if isinstance(raw.index, pd.DatetimeIndex) else raw.set_axis(pd.to_datetime(raw.index))
+                    if not df.index.is_monotonic_increasing:
+                        df = df.sort_index()
+
+                    has_adj = "Adj Close" in df.columns
+
+                    cols = []
+                    if include_ohlcv:
+                        for c in ("Open", "High", "Low", "Volume"):
+                            if c in df.columns:
+                                cols.append(c)
+                    if "Close" in df.columns:
+                        cols.append("Close")
+                    if has_adj:
+                        cols.append("Adj Close")
+
+                    df_res_full = df[cols]
+                    df_res_full.index.name = "Datetime"
+
+                    # choose price series (from extended data)
+                    if use_adj and has_adj:
+                        price_series_for_rsi = df_res_full["Adj Close"]
+                        source_used = "Adj Close"
+                    elif "Close" in df_res_full.columns:
+                        price_series_for_rsi = df_res_full["Close"]
+                        source_used = "Close"
                     else:
-                        range_str = "לא מספיק נתונים לחישוב RSI בטווח זה (שקול להגדיל חימום)"
+                        st.error("אין עמודת מחיר זמינה לחישוב RSI.")
+                        price_series_for_rsi = None
+                        source_used = "None"
+
+                    if price_series_for_rsi is not None:
+                        # compute RSI on the extended series
+                        rsi_series_full = compute_rsi_cached(price_series_for_rsi, rsi_period)
+                        # warm the cache for the other price column as well, so flipping use_adj
+                        # on the same download is a cache hit instead of a second RSI pass
+                        other_source = "Close" if source_used == "Adj Close" else "Adj Close"
+                        if other_source in df_res_full.columns:
+                            compute_rsi_cached(df_res_full[other_source], rsi_period)
+                        # RSI is computed in float64 but stored as float32 — 0..100 shown to 2 decimals
+                        # needs far fewer than float32's ~7 digits. Prices stay float64: at 4 decimals
+                        # they don't fit float32 once above ~1000.
+                        df_res_full[rsi_col] = rsi_series_full.astype("float32")
+                        if "Volume" in df_res_full.columns:
+                            df_res_full["Volume"] = pd.to_numeric(df_res_full["Volume"], downcast="integer")
+
+                        # Now trim to user-visible window: from start_date -> end_date
+                        # The index is sorted, so both bounds are binary-searched (end inclusive, like `<=`)
+                        lo_ts = pd.Timestamp(start_date)
+                        hi_ts = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+                        i0, i1 = df_res_full.index.slice_locs(lo_ts, hi_ts)
+                        df_view = df_res_full.iloc[i0:i1]
+
+                        # Save last df (and what produced it) for display-only reruns
+                        st.session_state["last_df"] = df_view
+                        st.session_state["last_source"] = source_used
+                        st.session_state["last_view_key"] = view_key
+                    else:
+                        st.error("לא הוגדר מחיר לחישוב RSI.")
+
+            if df_view is not None:
+                # Rounding is presentation only: the view keeps full precision and the table,
+                # CSV and Excel format at write time. The schema is known: `cols` plus the RSI column.
+                decimals = {c: (2 if c == rsi_col else 4) for c in df_view.columns if c != "Volume"}
+
+                # Display info: find first/last non-null RSI in the view (should exist if warmup adequate)
+                non_null_idx = df_view.index[df_view[rsi_col].notna()]
+                if len(non_null_idx) > 0:
+                    first_idx = non_null_idx[0]
+                    last_idx = non_null_idx[-1]
+                    range_str = f"{first_idx.strftime('%Y-%m-%d %H:%M')} → {last_idx.strftime('%Y-%m-%d %H:%M')}"
+                else:
+                    range_str = "לא מספיק נתונים לחישוב RSI בטווח זה (שקול להגדיל חימום)"
 
-                    st.success(
-                        f"נמצאו {len(df_view)} שורות לתצוגה — חישוב RSI על בסיס: {source_used} — טווח RSI: {range_str}"
-                    )
+                st.success(
+                    f"נמצאו {len(df_view)} שורות לתצוגה — חישוב RSI על בסיס: {source_used} — טווח RSI: {range_str}"
+                )
 
-                    preview_count = st.slider(
-                        "הצג שורות (Preview)",
-                        min_value=5,
-                        max_value=min(1000, max(5, len(df_view))),
-                        value=min(25, max(5, len(df_view))),
-                        step=5
-                    )
-                    st.dataframe(df_view.tail(preview_count), use_container_width=True)
-
-                    with st.expander("הצג גרפים"):
-                        if "Close" in df_view.columns:
-                            st.line_chart(df_view["Close"].dropna().tail(500))
-                        if has_adj and "Adj Close" in df_view.columns:
-                            st.line_chart(df_view["Adj Close"].dropna().tail(500))
-                        if f"RSI_{rsi_period}" in df_view.columns:
-                            st.line_chart(df_view[f"RSI_{rsi_period}"].dropna().tail(500))
-
-                    # Downloads
-                    try:
-                        csv_bytes = make_csv_bytes(df_view)
-                        excel_bytes = make_excel_bytes(df_view)
-                    except Exception as e:
-                        st.error(f"שגיאה בהכנת קבצים להורדה: {e}")
-                        csv_bytes = None
-                        excel_bytes = None
-
-                    dl_col1, dl_col2 = st.columns(2)
-                    with dl_col1:
-                        if csv_bytes:
-                            st.download_button(
-                                label="הורד כ-CSV",
-                                data=csv_bytes,
-                                file_name=f"{ticker}_{start_date.isoformat()}_{end_date.isoformat()}_{interval}.csv",
-                                mime="text/csv",
-                            )
-                        else:
-                            st.button("CSV לא זמין", disabled=True)
-                    with dl_col2:
-                        if excel_bytes:
-                            st.download_button(
-                                label="הורד כ-Excel (.xlsx)",
-                                data=excel_bytes,
-                                file_name=f"{ticker}_{start_date.isoformat()}_{end_date.isoformat()}_{interval}.xlsx",
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            )
-                        else:
-                            st.button("Excel לא זמין", disabled=True)
-                else:
-                    st.error("לא הוגדר מחיר לחישוב RSI.")
+                preview_count = st.slider(
+                    "הצג שורות (Preview)",
+                    min_value=5,
+                    max_value=min(1000, max(5, len(df_view))),
+                    value=min(25, max(5, len(df_view))),
+                    step=5
+                )
+                st.dataframe(
+                    df_view.tail(preview_count).style.format({c: f"{{:.{d}f}}" for c, d in decimals.items()}, na_rep=""),
+                    use_container_width=True
+                )
+
+                # Charts are opt-in: an expander's body runs (and ships its data) even when collapsed
+                if st.toggle("הצג גרפים", key="show_charts"):
+                    for c in ("Close", "Adj Close", rsi_col):
+                        if c in df_view.columns:
+                            st.line_chart(_downsample(df_view[c].dropna()))
+
+                # Downloads — the Excel workbook is only built when its button is clicked
+                try:
+                    csv_bytes = make_csv_bytes(df_view, decimals, interval)
+                except Exception as e:
+                    st.error(f"שגיאה בהכנת קבצים להורדה: {e}")
+                    csv_bytes = None
+
+                dl_col1, dl_col2 = st.columns(2)
+                with dl_col1:
+                    if csv_bytes:
+                        st.download_button(
+                            label="הורד כ-CSV",
+                            data=csv_bytes,
+                            file_name=f"{ticker}_{start_date.isoformat()}_{end_date.isoformat()}_{interval}.csv",
+                            mime="text/csv",
+                        )
+                    else:
+                        st.button("CSV לא זמין", disabled=True)
+                with dl_col2:
+                    if _HAS_EXCEL:
+                        st.download_button(
+                            label="הורד כ-Excel (.xlsx)",
+                            data=partial(_excel_bytes_logged, df_view, decimals),
+                            file_name=f"{ticker}_{start_date.isoformat()}_{end_date.isoformat()}_{interval}.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        )
+                    else:
+                        st.error("שגיאה בהכנת קבצים להורדה: xlsxwriter / openpyxl אינם מותקנים")
+                        st.button("Excel לא זמין", disabled=True)
 
 # ---------- Footer ----------
 st.markdown("***")